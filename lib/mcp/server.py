@@ -1,57 +1,668 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
 import httpx
+import asyncio
+from contextlib import asynccontextmanager
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
 from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel, ConfigDict, ValidationError
+from jinja2 import DictLoader, Environment
 from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
 from mcp.server.sse import SseServerTransport
 from starlette.requests import Request
-from starlette.responses import HTMLResponse, JSONResponse
+from starlette.responses import Response
 from starlette.routing import Mount, Route
 from mcp.server import Server
-import uvicorn
-import json
+import hashlib
+import orjson
 import os
+import random
+import time
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
 
 # Initialize FastMCP server with a name
 mcp = FastMCP("fintech-compliance")
 
-# Constants for API access
-API_BASE = os.environ.get("COMPLIANCE_API_BASE", "https://api.compliance-service.com")
-API_KEY = os.environ.get("COMPLIANCE_API_KEY", "")
+@lru_cache(maxsize=1)
+def settings() -> SimpleNamespace:
+    """Read compliance API access settings from the environment on first use."""
+    api_key = os.environ.get("COMPLIANCE_API_KEY", "")
+    if not api_key and not os.environ.get("DEVELOPMENT_MODE"):
+        print("WARNING: API key not found. Set COMPLIANCE_API_KEY environment variable for production use.")
+    return SimpleNamespace(
+        base=os.environ.get("COMPLIANCE_API_BASE", "https://api.compliance-service.com"),
+        key=api_key
+    )
 
-if not API_KEY and not os.environ.get("DEVELOPMENT_MODE"):
-    print("WARNING: API key not found. Set COMPLIANCE_API_KEY environment variable for production use.")
+# Maximum number of concurrent upstream requests (also sizes the connection pool)
+MAX_INFLIGHT = int(os.environ.get("COMPLIANCE_MAX_INFLIGHT", "64"))
+MIN_INFLIGHT = int(os.environ.get("COMPLIANCE_MIN_INFLIGHT", "1"))
+# Latency (seconds) below which the concurrency limit is allowed to grow
+TARGET_LATENCY = float(os.environ.get("COMPLIANCE_TARGET_LATENCY", "1.0"))
+# Attempts per upstream request, and the statuses worth retrying
+MAX_ATTEMPTS = max(1, int(os.environ.get("COMPLIANCE_MAX_ATTEMPTS", "4")))
+RETRY_STATUSES = {429, 502, 503, 504}
+# Methods that are safe to resend after the upstream may already have processed them
+IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+# Upper bound (seconds) on any single backoff, including a server-sent Retry-After
+MAX_RETRY_DELAY = 8.0
+# HTTP methods accepted by make_api_request
+_METHODS = frozenset({"GET", "POST", "PUT", "DELETE", "PATCH"})
+# Proactive request budget per minute against the compliance API
+REQUESTS_PER_MINUTE = int(os.environ.get("COMPLIANCE_RPM", "600"))
+# How long (seconds) successful GET responses are served from memory
+CACHE_TTL = float(os.environ.get("COMPLIANCE_CACHE_TTL", "60"))
+CACHE_MAXSIZE = int(os.environ.get("COMPLIANCE_CACHE_MAXSIZE", "10000"))
+# Build reports from parallel sub-queries instead of the server-side reports/generate call
+REPORT_FANOUT = bool(os.environ.get("COMPLIANCE_REPORT_FANOUT"))
+# Reports with more risk factors + categories than this are formatted off the event loop
+FORMAT_OFFLOAD_THRESHOLD = int(os.environ.get("COMPLIANCE_FORMAT_OFFLOAD_THRESHOLD", "32"))
 
-async def make_api_request(endpoint: str, method: str = "GET", params: Dict = None, data: Dict = None) -> Dict[str, Any]:
-    """Make a request to the compliance API with proper error handling."""
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
+class DynamicSemaphore:
+    """Semaphore whose permit count adapts to upstream health (AIMD).
+    
+    The limit grows by one permit after a run of fast successes and is halved
+    when the upstream signals overload (429, 5xx or a timeout). Overload from
+    requests sent before the last decrease is ignored, so a burst of failures
+    halves the limit once rather than once per failed request.
+    """
+    
+    def __init__(self, permits: int, min_permits: int, max_permits: int,
+                 target_latency: float, increase_every: int = 10, alpha: float = 0.2):
+        self.min_permits = max(1, min_permits)
+        self.max_permits = max(self.min_permits, max_permits)
+        self.target_permits = min(max(permits, self.min_permits), self.max_permits)
+        self.target_latency = target_latency
+        self.increase_every = increase_every
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._last_decrease = float("-inf")
+        self._cond: Optional[asyncio.Condition] = None
+    
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+    
+    async def acquire(self) -> None:
+        # Honour any Retry-After pause before admitting new requests
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self._active < self.target_permits)
+            self._active += 1
+    
+    async def release(self) -> None:
+        cond = self._condition()
+        async with cond:
+            self._active -= 1
+            cond.notify(max(1, self.target_permits - self._active))
+    
+    async def __aenter__(self) -> "DynamicSemaphore":
+        await self.acquire()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.release()
+    
+    def record_success(self, elapsed: float) -> None:
+        """Record a successful request and additively grow the limit if latency allows."""
+        if self.latency_ewma is None:
+            self.latency_ewma = elapsed
+        else:
+            self.latency_ewma = self.alpha * elapsed + (1 - self.alpha) * self.latency_ewma
+        
+        self._successes += 1
+        if self._successes >= self.increase_every:
+            self._successes = 0
+            if self.latency_ewma <= self.target_latency:
+                self.target_permits = min(self.max_permits, self.target_permits + 1)
+    
+    def record_overload(self, started_at: float, retry_after: Optional[float] = None) -> None:
+        """Record an overload signal and multiplicatively shrink the limit.
+        
+        started_at is the monotonic time the failed request was sent.
+        """
+        self._successes = 0
+        if started_at >= self._last_decrease:
+            self.target_permits = max(self.min_permits, int(self.target_permits * 0.5))
+            self._last_decrease = time.monotonic()
+        if retry_after:
+            self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+
+def _parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Return the Retry-After header in seconds (capped), if present and numeric."""
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(MAX_RETRY_DELAY, max(0.0, float(value)))
+    except ValueError:
+        return None
+
+def _rate_limit_pause(response: httpx.Response) -> Optional[float]:
+    """Return how long to pause when the provider reports a nearly exhausted quota."""
+    remaining = response.headers.get("x-ratelimit-remaining")
+    if remaining is None:
+        return None
+    try:
+        remaining_count = int(remaining)
+        limit = int(response.headers.get("x-ratelimit-limit", REQUESTS_PER_MINUTE))
+    except ValueError:
+        return None
+    if remaining_count >= limit * 0.1:
+        return None
+    retry_after = _parse_retry_after(response)
+    return retry_after if retry_after is not None else 1.0
+
+# Caps in-flight upstream requests so bursts queue here instead of opening more sockets
+_inflight = DynamicSemaphore(MAX_INFLIGHT, MIN_INFLIGHT, MAX_INFLIGHT, TARGET_LATENCY)
+
+# Spreads requests across the minute so bursts from several tools stay within quota
+_rpm = AsyncLimiter(max_rate=REQUESTS_PER_MINUTE, time_period=60)
+
+# LRU + TTL cache of successful GET responses keyed by (endpoint, params)
+_cache: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+
+# Upstream GETs currently in progress, so identical concurrent calls share one request
+_pending: Dict[tuple, asyncio.Task] = {}
+
+# Shared HTTP client so connections to the compliance API are pooled and kept alive
+_client: Optional[httpx.AsyncClient] = None
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared compliance API client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        config = settings()
+        _client = httpx.AsyncClient(
+            base_url=config.base.rstrip("/") + "/",
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=MAX_INFLIGHT,
+                max_keepalive_connections=max(1, MAX_INFLIGHT // 2)
+            ),
+            timeout=30.0,
+            headers={
+                "Authorization": f"Bearer {config.key}",
+                "Accept": "application/json"
+            }
+        )
+    return _client
+
+async def _close_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+@asynccontextmanager
+async def _lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Create the shared client on startup and close it on shutdown."""
+    _get_client()
+    try:
+        yield
+    finally:
+        await _close_client()
+
+async def _request_once(endpoint: str, method: str, params: Optional[Dict], data: Optional[Dict]) -> httpx.Response:
+    """Issue one upstream request under the concurrency and rate limits."""
+    client = _get_client()
+    
+    async with _inflight:
+        start = time.monotonic()
+        try:
+            async with _rpm:
+                response = await client.request(method, endpoint, params=params, json=data)
+        except httpx.TimeoutException:
+            _inflight.record_overload(start)
+            raise
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            _inflight.record_overload(start, _parse_retry_after(response))
+        else:
+            _inflight.record_success(time.monotonic() - start)
+        
+        # Hold the slot a little longer when the provider says the quota is almost spent
+        pause = _rate_limit_pause(response)
+        if pause:
+            await asyncio.sleep(pause)
+    
+    return response
+
+def _backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Seconds to wait before retrying, preferring the server's Retry-After."""
+    if response is not None:
+        retry_after = _parse_retry_after(response)
+        if retry_after is not None:
+            return retry_after
+    return min(MAX_RETRY_DELAY, 0.25 * 2 ** attempt) + random.random() * 0.25
+
+async def _send_request(endpoint: str, method: str, params: Optional[Dict], data: Optional[Dict]) -> Dict[str, Any]:
+    """Send a request to the compliance API, retrying transient failures.
     
-    url = f"{API_BASE}/{endpoint}"
+    Non-idempotent methods are only retried when the request cannot have
+    reached the upstream (connection failures and 429 rejections), so a
+    report is never submitted twice. Returns an error dict instead of raising
+    once retries are exhausted.
+    """
+    if method not in _METHODS:
+        return {"error": f"Unsupported method: {method}"}
     
-    async with httpx.AsyncClient() as client:
+    idempotent = method in IDEMPOTENT_METHODS
+    for attempt in range(MAX_ATTEMPTS):
+        final_attempt = attempt == MAX_ATTEMPTS - 1
         try:
-            if method == "GET":
-                response = await client.get(url, headers=headers, params=params, timeout=30.0)
-            elif method == "POST":
-                response = await client.post(url, headers=headers, json=data, timeout=30.0)
-            else:
-                return {"error": f"Unsupported method: {method}"}
+            response = await _request_once(endpoint, method, params, data)
+            retryable = response.status_code in RETRY_STATUSES if idempotent else response.status_code == 429
+            if retryable and not final_attempt:
+                await asyncio.sleep(_backoff_delay(attempt, response))
+                continue
             
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             return {"error": f"HTTP error: {e.response.status_code}", "details": e.response.text}
         except httpx.RequestError as e:
+            if not final_attempt and (idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))):
+                await asyncio.sleep(_backoff_delay(attempt))
+                continue
             return {"error": f"Request error: {str(e)}"}
         except Exception as e:
             return {"error": f"Unexpected error: {str(e)}"}
 
+async def _fetch_shared(cache_key: tuple, endpoint: str, params: Optional[Dict]) -> Dict[str, Any]:
+    """Fetch a GET on behalf of every caller waiting on it and cache a successful result."""
+    try:
+        result = await _send_request(endpoint, "GET", params, None)
+        if "error" not in result:
+            _cache[cache_key] = result
+        return result
+    finally:
+        _pending.pop(cache_key, None)
+
+async def make_api_request(endpoint: str, method: str = "GET", params: Dict = None, data: Dict = None) -> Dict[str, Any]:
+    """Make a request to the compliance API with proper error handling.
+    
+    GET requests are served from the TTL cache when possible, and concurrent
+    identical GETs share a single upstream request.
+    """
+    # Endpoints are relative to the client's base_url
+    endpoint = endpoint.lstrip("/")
+    
+    if method != "GET":
+        return await _send_request(endpoint, method, params, data)
+    
+    cache_key = (endpoint, tuple(sorted((params or {}).items())))
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # The upstream call runs in its own task, so cancelling one caller leaves the others waiting
+    pending = _pending.get(cache_key)
+    if pending is None:
+        pending = asyncio.ensure_future(_fetch_shared(cache_key, endpoint, params))
+        _pending[cache_key] = pending
+    return await asyncio.shield(pending)
+
+# Response models for the compliance API, validated once per response
+
+class _ApiModel(BaseModel):
+    """Base for compliance API payloads; numeric values are accepted for text fields.
+    
+    Fields may be null; the templates substitute the usual placeholder text.
+    """
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+def _invalid_response(e: ValidationError) -> str:
+    """Describe the first field that failed validation, e.g. "issues.0.category: Field required"."""
+    errors = e.errors()
+    first = errors[0]
+    location = ".".join(str(part) for part in first["loc"]) or "response"
+    more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""
+    return f"Invalid response: {location}: {first['msg']}{more}"
+
+class TransactionIssue(_ApiModel):
+    category: Optional[str]
+    description: Optional[str]
+    recommendation: Optional[str] = None
+
+class RegulatoryReference(_ApiModel):
+    code: Optional[str]
+    description: Optional[str]
+
+class TransactionAnalysis(_ApiModel):
+    compliance_status: Optional[str] = None
+    risk_score: Optional[Union[int, float]] = None
+    issues: Optional[List[TransactionIssue]] = []
+    regulatory_references: Optional[List[RegulatoryReference]] = []
+
+class IdentityVerification(_ApiModel):
+    status: Optional[str] = "Unknown"
+    method: Optional[str] = "Unknown"
+    issues: Optional[List[Any]] = []
+
+class WatchlistMatch(_ApiModel):
+    list_name: Optional[str] = None
+    match_details: Optional[str] = None
+
+class AmlScreening(_ApiModel):
+    status: Optional[str] = "Unknown"
+    risk_level: Optional[str] = "Unknown"
+    matches: Optional[List[WatchlistMatch]] = []
+
+class KycVerification(_ApiModel):
+    verification_status: Optional[str] = None
+    verification_date: Optional[str] = None
+    identity_verification: Optional[IdentityVerification] = None
+    aml_screening: Optional[AmlScreening] = None
+    required_actions: Optional[List[Any]] = []
+
+class SentimentAnalysis(_ApiModel):
+    overall: Optional[str] = "Unknown"
+
+class CommunicationIssue(_ApiModel):
+    category: Optional[str]
+    description: Optional[str]
+    severity: Optional[str] = None
+    context: Optional[str] = None
+
+class CommunicationAnalysis(_ApiModel):
+    communication_type: Optional[str] = None
+    compliance_status: Optional[str] = None
+    sentiment_analysis: Optional[SentimentAnalysis] = None
+    issues: Optional[List[CommunicationIssue]] = []
+    recommendations: Optional[List[Any]] = []
+
+class RegulatoryUpdate(_ApiModel):
+    title: Optional[str] = "Untitled Update"
+    date: Optional[str] = "Unknown"
+    jurisdiction: Optional[str] = "Global"
+    category: Optional[str] = "General"
+    summary: Optional[str] = "No summary available"
+    action_items: Optional[List[Any]] = []
+
+class RegulatoryUpdates(_ApiModel):
+    updates: Optional[List[RegulatoryUpdate]] = []
+
+class RiskFactor(_ApiModel):
+    name: Optional[str]
+    level: Optional[str]
+    details: Optional[str] = None
+
+class RiskAssessment(_ApiModel):
+    overall: Optional[str] = "Unknown"
+    factors: Optional[List[RiskFactor]] = []
+
+class ComplianceCategory(_ApiModel):
+    name: Optional[str]
+    status: Optional[str]
+    details: Optional[str] = None
+
+class ComplianceStatus(_ApiModel):
+    overall: Optional[str] = "Unknown"
+    categories: Optional[List[ComplianceCategory]] = []
+
+class ComplianceReport(_ApiModel):
+    summary: Optional[str] = None
+    risk_assessment: Optional[RiskAssessment] = None
+    compliance_status: Optional[ComplianceStatus] = None
+    recommendations: Optional[List[Any]] = []
+
+# Markdown templates for tool output, compiled once at import
+_TEMPLATES = {
+    "transaction_analysis": """\
+## Transaction Compliance Analysis
+
+**Transaction ID**: {{ transaction_id }}
+**Analysis Time**: {{ ts }}
+
+{% if analysis.compliance_status is not none %}
+**Compliance Status**: {{ analysis.compliance_status }}
+{% endif %}
+{% if analysis.risk_score is not none %}
+**Risk Score**: {{ analysis.risk_score }}/100
+{% endif %}
+{% if analysis.issues %}
+
+### Identified Issues
+
+{% for issue in analysis.issues %}
+- **{{ issue.category }}**: {{ issue.description }}
+{% if issue.recommendation is not none %}
+  - Recommendation: {{ issue.recommendation }}
+{% endif %}
+{% endfor %}
+{% else %}
+
+### No compliance issues detected
+{% endif %}
+{% if analysis.regulatory_references %}
+
+### Regulatory References
+
+{% for ref in analysis.regulatory_references %}
+- {{ ref.code }}: {{ ref.description }}
+{% endfor %}
+{% endif %}
+""",
+    "kyc_verification": """\
+## Customer KYC Verification
+
+**Customer ID**: {{ customer_id }}
+**Verification Time**: {{ ts }}
+
+{% if kyc.verification_status is not none %}
+**Verification Status**: {{ kyc.verification_status }}
+{% endif %}
+{% if kyc.verification_date is not none %}
+**Last Verified**: {{ kyc.verification_date }}
+{% endif %}
+{% if kyc.identity_verification is not none %}
+{% set id_verification = kyc.identity_verification %}
+
+### Identity Verification
+
+- **Status**: {{ id_verification.status if id_verification.status is not none else "Unknown" }}
+- **Method**: {{ id_verification.method if id_verification.method is not none else "Unknown" }}
+{% if id_verification.issues %}
+- **Issues**:
+{% for issue in id_verification.issues %}
+  - {{ issue }}
+{% endfor %}
+{% endif %}
+{% endif %}
+{% if kyc.aml_screening is not none %}
+{% set aml = kyc.aml_screening %}
+
+### AML Screening
+
+- **Status**: {{ aml.status if aml.status is not none else "Unknown" }}
+- **Risk Level**: {{ aml.risk_level if aml.risk_level is not none else "Unknown" }}
+{% if aml.matches %}
+- **Watchlist Matches**:
+{% for match in aml.matches %}
+  - {{ match.list_name }}: {{ match.match_details }}
+{% endfor %}
+{% endif %}
+{% endif %}
+{% if kyc.required_actions %}
+
+### Required Actions
+
+{% for action in kyc.required_actions %}
+- {{ action }}
+{% endfor %}
+{% endif %}
+""",
+    "communication_analysis": """\
+## Communication Compliance Analysis
+
+**Communication ID**: {{ communication_id }}
+**Analysis Time**: {{ ts }}
+
+{% if analysis.communication_type is not none %}
+**Type**: {{ analysis.communication_type }}
+{% endif %}
+{% if analysis.compliance_status is not none %}
+**Compliance Status**: {{ analysis.compliance_status }}
+{% endif %}
+{% if analysis.sentiment_analysis is not none %}
+**Sentiment**: {{ analysis.sentiment_analysis.overall if analysis.sentiment_analysis.overall is not none else "Unknown" }}
+{% endif %}
+{% if analysis.issues %}
+
+### Identified Issues
+
+{% for issue in analysis.issues %}
+- **{{ issue.category }}**: {{ issue.description }}
+{% if issue.severity is not none %}
+  - Severity: {{ issue.severity }}
+{% endif %}
+{% if issue.context is not none %}
+  - Context: "{{ issue.context }}"
+{% endif %}
+{% endfor %}
+{% else %}
+
+### No compliance issues detected
+{% endif %}
+{% if analysis.recommendations %}
+
+### Recommendations
+
+{% for rec in analysis.recommendations %}
+- {{ rec }}
+{% endfor %}
+{% endif %}
+""",
+    "regulatory_updates": """\
+## Recent Regulatory Updates
+
+{% for update in regulatory.updates or () %}
+### {{ update.title if update.title is not none else "Untitled Update" }}
+
+**Date**: {{ update.date if update.date is not none else "Unknown" }}
+**Jurisdiction**: {{ update.jurisdiction if update.jurisdiction is not none else "Global" }}
+**Category**: {{ update.category if update.category is not none else "General" }}
+
+{{ update.summary if update.summary is not none else "No summary available" }}
+
+{% if update.action_items %}
+**Required Actions**:
+{% for item in update.action_items %}
+- {{ item }}
+{% endfor %}
+{% endif %}
+
+---
+
+{% else %}
+No recent regulatory updates available.
+{% endfor %}
+""",
+    "compliance_report": """\
+## {{ report_type.capitalize() }} Compliance Report
+
+**Entity ID**: {{ entity_id }}
+**Report Time**: {{ ts }}
+**Report Type**: {{ report_type.capitalize() }}
+
+{% if report.summary is not none %}
+### Summary
+
+{{ report.summary }}
+
+{% endif %}
+{% if report.risk_assessment is not none %}
+{% set risk = report.risk_assessment %}
+### Risk Assessment
+
+**Overall Risk**: {{ risk.overall if risk.overall is not none else "Unknown" }}
+{% if risk.factors %}
+
+**Risk Factors**:
+{% for factor in risk.factors %}
+- **{{ factor.name }}**: {{ factor.level }}
+{% if factor.details is not none %}
+  - {{ factor.details }}
+{% endif %}
+{% endfor %}
+{% endif %}
+{% endif %}
+{% if report.compliance_status is not none %}
+{% set status = report.compliance_status %}
+
+### Compliance Status
+
+**Status**: {{ status.overall if status.overall is not none else "Unknown" }}
+
+{% for category in status.categories or () %}
+- **{{ category.name }}**: {{ category.status }}
+{% if category.details is not none %}
+  - {{ category.details }}
+{% endif %}
+{% endfor %}
+{% endif %}
+{% if report.recommendations %}
+
+### Recommendations
+
+{% for rec in report.recommendations %}
+- {{ rec }}
+{% endfor %}
+{% endif %}
+""",
+}
+
+_template_env = Environment(
+    loader=DictLoader(_TEMPLATES),
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    keep_trailing_newline=True
+)
+_TPL_TRANSACTION = _template_env.get_template("transaction_analysis")
+_TPL_KYC = _template_env.get_template("kyc_verification")
+_TPL_COMMUNICATION = _template_env.get_template("communication_analysis")
+_TPL_REGULATORY = _template_env.get_template("regulatory_updates")
+_TPL_REPORT = _template_env.get_template("compliance_report")
+
 # Define MCP tools for fintech compliance
 
+# Mock data returned in development mode
+_MOCK_ANALYZE_TRANSACTION = {
+    "compliance_status": "COMPLIANT",
+    "risk_score": 25,
+    "issues": [
+        {
+            "category": "Documentation",
+            "description": "Missing secondary verification for high-value transaction",
+            "recommendation": "Request additional documentation from the customer"
+        }
+    ],
+    "regulatory_references": [
+        {
+            "code": "REG-123",
+            "description": "High-value transaction verification requirements"
+        }
+    ]
+}
+
+def _format_transaction_analysis(analysis: TransactionAnalysis, transaction_id: str) -> str:
+    """Format a transaction analysis as markdown."""
+    return _TPL_TRANSACTION.render(analysis=analysis, transaction_id=transaction_id, ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
 @mcp.tool()
 async def analyze_transaction(transaction_id: str) -> str:
     """Analyze a financial transaction for compliance issues.
@@ -64,56 +675,40 @@ async def analyze_transaction(transaction_id: str) -> str:
     """
     # In development mode, return mock data
     if os.environ.get("DEVELOPMENT_MODE"):
-        mock_data = {
-            "compliance_status": "COMPLIANT",
-            "risk_score": 25,
-            "issues": [
-                {
-                    "category": "Documentation",
-                    "description": "Missing secondary verification for high-value transaction",
-                    "recommendation": "Request additional documentation from the customer"
-                }
-            ],
-            "regulatory_references": [
-                {
-                    "code": "REG-123",
-                    "description": "High-value transaction verification requirements"
-                }
-            ]
-        }
-        data = mock_data
+        data = _MOCK_ANALYZE_TRANSACTION
     else:
         data = await make_api_request(f"transactions/{transaction_id}/analyze")
     
     if "error" in data:
         return f"Error analyzing transaction: {data['error']}"
     
-    # Format the analysis results
-    result = f"## Transaction Compliance Analysis\n\n"
-    result += f"**Transaction ID**: {transaction_id}\n"
-    result += f"**Analysis Time**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-    
-    if "compliance_status" in data:
-        result += f"**Compliance Status**: {data['compliance_status']}\n"
+    try:
+        analysis = TransactionAnalysis.model_validate(data)
+    except ValidationError as e:
+        return f"Error analyzing transaction: {_invalid_response(e)}"
     
-    if "risk_score" in data:
-        result += f"**Risk Score**: {data['risk_score']}/100\n"
-    
-    if "issues" in data and data["issues"]:
-        result += "\n### Identified Issues\n\n"
-        for issue in data["issues"]:
-            result += f"- **{issue['category']}**: {issue['description']}\n"
-            if "recommendation" in issue:
-                result += f"  - Recommendation: {issue['recommendation']}\n"
-    else:
-        result += "\n### No compliance issues detected\n"
-    
-    if "regulatory_references" in data and data["regulatory_references"]:
-        result += "\n### Regulatory References\n\n"
-        for ref in data["regulatory_references"]:
-            result += f"- {ref['code']}: {ref['description']}\n"
-    
-    return result
+    return _format_transaction_analysis(analysis, transaction_id)
+
+# Mock data returned in development mode
+_MOCK_VERIFY_CUSTOMER_KYC = {
+    "verification_status": "VERIFIED",
+    "verification_date": "2025-03-15",
+    "identity_verification": {
+        "status": "VERIFIED",
+        "method": "Document Verification + Biometric",
+        "issues": []
+    },
+    "aml_screening": {
+        "status": "CLEARED",
+        "risk_level": "LOW",
+        "matches": []
+    },
+    "required_actions": []
+}
+
+def _format_kyc_verification(kyc: KycVerification, customer_id: str) -> str:
+    """Format a KYC verification as markdown."""
+    return _TPL_KYC.render(kyc=kyc, customer_id=customer_id, ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
 @mcp.tool()
 async def verify_customer_kyc(customer_id: str) -> str:
@@ -127,65 +722,44 @@ async def verify_customer_kyc(customer_id: str) -> str:
     """
     # In development mode, return mock data
     if os.environ.get("DEVELOPMENT_MODE"):
-        mock_data = {
-            "verification_status": "VERIFIED",
-            "verification_date": "2025-03-15",
-            "identity_verification": {
-                "status": "VERIFIED",
-                "method": "Document Verification + Biometric",
-                "issues": []
-            },
-            "aml_screening": {
-                "status": "CLEARED",
-                "risk_level": "LOW",
-                "matches": []
-            },
-            "required_actions": []
-        }
-        data = mock_data
+        data = _MOCK_VERIFY_CUSTOMER_KYC
     else:
         data = await make_api_request(f"customers/{customer_id}/kyc")
     
     if "error" in data:
         return f"Error verifying customer KYC: {data['error']}"
     
-    # Format the KYC verification results
-    result = f"## Customer KYC Verification\n\n"
-    result += f"**Customer ID**: {customer_id}\n"
-    result += f"**Verification Time**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-    
-    if "verification_status" in data:
-        result += f"**Verification Status**: {data['verification_status']}\n"
-    
-    if "verification_date" in data:
-        result += f"**Last Verified**: {data['verification_date']}\n"
-    
-    if "identity_verification" in data:
-        result += "\n### Identity Verification\n\n"
-        id_verification = data["identity_verification"]
-        result += f"- **Status**: {id_verification.get('status', 'Unknown')}\n"
-        result += f"- **Method**: {id_verification.get('method', 'Unknown')}\n"
-        if "issues" in id_verification and id_verification["issues"]:
-            result += "- **Issues**:\n"
-            for issue in id_verification["issues"]:
-                result += f"  - {issue}\n"
-    
-    if "aml_screening" in data:
-        result += "\n### AML Screening\n\n"
-        aml = data["aml_screening"]
-        result += f"- **Status**: {aml.get('status', 'Unknown')}\n"
-        result += f"- **Risk Level**: {aml.get('risk_level', 'Unknown')}\n"
-        if "matches" in aml and aml["matches"]:
-            result += "- **Watchlist Matches**:\n"
-            for match in aml["matches"]:
-                result += f"  - {match.get('list_name')}: {match.get('match_details')}\n"
-    
-    if "required_actions" in data and data["required_actions"]:
-        result += "\n### Required Actions\n\n"
-        for action in data["required_actions"]:
-            result += f"- {action}\n"
-    
-    return result
+    try:
+        kyc = KycVerification.model_validate(data)
+    except ValidationError as e:
+        return f"Error verifying customer KYC: {_invalid_response(e)}"
+    
+    return _format_kyc_verification(kyc, customer_id)
+
+# Mock data returned in development mode
+_MOCK_ANALYZE_COMMUNICATION = {
+    "communication_type": "Email",
+    "compliance_status": "REVIEW_REQUIRED",
+    "sentiment_analysis": {
+        "overall": "Neutral"
+    },
+    "issues": [
+        {
+            "category": "Disclosure",
+            "description": "Missing required risk disclosure",
+            "severity": "Medium",
+            "context": "We recommend investing in our new high-yield fund..."
+        }
+    ],
+    "recommendations": [
+        "Add standard risk disclosure statement",
+        "Include performance disclaimer"
+    ]
+}
+
+def _format_communication_analysis(analysis: CommunicationAnalysis, communication_id: str) -> str:
+    """Format a communication analysis as markdown."""
+    return _TPL_COMMUNICATION.render(analysis=analysis, communication_id=communication_id, ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
 @mcp.tool()
 async def analyze_communication(communication_id: str) -> str:
@@ -199,64 +773,53 @@ async def analyze_communication(communication_id: str) -> str:
     """
     # In development mode, return mock data
     if os.environ.get("DEVELOPMENT_MODE"):
-        mock_data = {
-            "communication_type": "Email",
-            "compliance_status": "REVIEW_REQUIRED",
-            "sentiment_analysis": {
-                "overall": "Neutral"
-            },
-            "issues": [
-                {
-                    "category": "Disclosure",
-                    "description": "Missing required risk disclosure",
-                    "severity": "Medium",
-                    "context": "We recommend investing in our new high-yield fund..."
-                }
-            ],
-            "recommendations": [
-                "Add standard risk disclosure statement",
-                "Include performance disclaimer"
-            ]
-        }
-        data = mock_data
+        data = _MOCK_ANALYZE_COMMUNICATION
     else:
         data = await make_api_request(f"communications/{communication_id}/analyze")
     
     if "error" in data:
         return f"Error analyzing communication: {data['error']}"
     
-    # Format the communication analysis results
-    result = f"## Communication Compliance Analysis\n\n"
-    result += f"**Communication ID**: {communication_id}\n"
-    result += f"**Analysis Time**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-    
-    if "communication_type" in data:
-        result += f"**Type**: {data['communication_type']}\n"
-    
-    if "compliance_status" in data:
-        result += f"**Compliance Status**: {data['compliance_status']}\n"
-    
-    if "sentiment_analysis" in data:
-        sentiment = data["sentiment_analysis"]
-        result += f"**Sentiment**: {sentiment.get('overall', 'Unknown')}\n"
-    
-    if "issues" in data and data["issues"]:
-        result += "\n### Identified Issues\n\n"
-        for issue in data["issues"]:
-            result += f"- **{issue['category']}**: {issue['description']}\n"
-            if "severity" in issue:
-                result += f"  - Severity: {issue['severity']}\n"
-            if "context" in issue:
-                result += f"  - Context: \"{issue['context']}\"\n"
-    else:
-        result += "\n### No compliance issues detected\n"
-    
-    if "recommendations" in data and data["recommendations"]:
-        result += "\n### Recommendations\n\n"
-        for rec in data["recommendations"]:
-            result += f"- {rec}\n"
+    try:
+        analysis = CommunicationAnalysis.model_validate(data)
+    except ValidationError as e:
+        return f"Error analyzing communication: {_invalid_response(e)}"
     
-    return result
+    return _format_communication_analysis(analysis, communication_id)
+
+# Mock data returned in development mode
+_MOCK_REGULATORY_UPDATES = {
+    "updates": [
+        {
+            "title": "New AML Reporting Requirements",
+            "date": "2025-03-01",
+            "jurisdiction": "United States",
+            "category": "Anti-Money Laundering",
+            "summary": "The Financial Crimes Enforcement Network (FinCEN) has issued new guidelines for reporting suspicious transactions related to cryptocurrency exchanges.",
+            "action_items": [
+                "Update AML monitoring systems",
+                "Train compliance staff on new requirements",
+                "Implement enhanced due diligence for crypto transactions"
+            ]
+        },
+        {
+            "title": "ESG Disclosure Framework",
+            "date": "2025-02-15",
+            "jurisdiction": "European Union",
+            "category": "ESG Compliance",
+            "summary": "The European Securities and Markets Authority (ESMA) has finalized the new ESG disclosure framework for financial products.",
+            "action_items": [
+                "Assess current ESG reporting capabilities",
+                "Implement new disclosure templates",
+                "Review investment products for compliance"
+            ]
+        }
+    ]
+}
+
+def _format_regulatory_updates(regulatory: RegulatoryUpdates) -> str:
+    """Format regulatory updates as markdown."""
+    return _TPL_REGULATORY.render(regulatory=regulatory)
 
 @mcp.tool()
 async def get_regulatory_updates() -> str:
@@ -267,62 +830,120 @@ async def get_regulatory_updates() -> str:
     """
     # In development mode, return mock data
     if os.environ.get("DEVELOPMENT_MODE"):
-        mock_data = {
-            "updates": [
-                {
-                    "title": "New AML Reporting Requirements",
-                    "date": "2025-03-01",
-                    "jurisdiction": "United States",
-                    "category": "Anti-Money Laundering",
-                    "summary": "The Financial Crimes Enforcement Network (FinCEN) has issued new guidelines for reporting suspicious transactions related to cryptocurrency exchanges.",
-                    "action_items": [
-                        "Update AML monitoring systems",
-                        "Train compliance staff on new requirements",
-                        "Implement enhanced due diligence for crypto transactions"
-                    ]
-                },
-                {
-                    "title": "ESG Disclosure Framework",
-                    "date": "2025-02-15",
-                    "jurisdiction": "European Union",
-                    "category": "ESG Compliance",
-                    "summary": "The European Securities and Markets Authority (ESMA) has finalized the new ESG disclosure framework for financial products.",
-                    "action_items": [
-                        "Assess current ESG reporting capabilities",
-                        "Implement new disclosure templates",
-                        "Review investment products for compliance"
-                    ]
-                }
-            ]
-        }
-        data = mock_data
+        data = _MOCK_REGULATORY_UPDATES
     else:
         data = await make_api_request("regulatory/updates")
     
     if "error" in data:
         return f"Error fetching regulatory updates: {data['error']}"
     
-    # Format the regulatory updates
-    result = f"## Recent Regulatory Updates\n\n"
+    try:
+        regulatory = RegulatoryUpdates.model_validate(data)
+    except ValidationError as e:
+        return f"Error fetching regulatory updates: {_invalid_response(e)}"
     
-    if "updates" in data and data["updates"]:
-        for update in data["updates"]:
-            result += f"### {update.get('title', 'Untitled Update')}\n\n"
-            result += f"**Date**: {update.get('date', 'Unknown')}\n"
-            result += f"**Jurisdiction**: {update.get('jurisdiction', 'Global')}\n"
-            result += f"**Category**: {update.get('category', 'General')}\n\n"
-            result += f"{update.get('summary', 'No summary available')}\n\n"
-            
-            if "action_items" in update and update["action_items"]:
-                result += "**Required Actions**:\n"
-                for item in update["action_items"]:
-                    result += f"- {item}\n"
-            
-            result += "\n---\n\n"
-    else:
-        result += "No recent regulatory updates available.\n"
+    return _format_regulatory_updates(regulatory)
+
+async def _gather_report_data(entity_id: str, report_type: str) -> Dict[str, Any]:
+    """Assemble compliance report data from independent sub-queries issued in parallel.
     
-    return result
+    Risk reports only need the entity's risk assessment; other report types
+    also pull its KYC record and the current regulatory updates. Only what
+    the upstream returned for the entity is reported, so the overall
+    compliance status is left to the model default.
+    """
+    requests = [make_api_request(f"entities/{entity_id}/risk")]
+    if report_type != "risk":
+        requests.append(make_api_request(f"customers/{entity_id}/kyc"))
+        requests.append(make_api_request("regulatory/updates"))
+    parts = await asyncio.gather(*requests)
+    
+    for part in parts:
+        if "error" in part:
+            return part
+    
+    try:
+        risk = RiskAssessment.model_validate(parts[0])
+        kyc = KycVerification.model_validate(parts[1]) if len(parts) > 1 else None
+        regulatory = RegulatoryUpdates.model_validate(parts[2]) if len(parts) > 2 else None
+    except ValidationError as e:
+        return {"error": _invalid_response(e)}
+    
+    data: Dict[str, Any] = {"risk_assessment": risk}
+    
+    if kyc is not None:
+        if kyc.verification_status is not None:
+            aml = kyc.aml_screening
+            data["compliance_status"] = {"categories": [{
+                "name": "KYC/AML",
+                "status": kyc.verification_status,
+                "details": None if aml is None else f"AML screening: {aml.status or 'Unknown'} (risk level {aml.risk_level or 'Unknown'})"
+            }]}
+        data["recommendations"] = list(kyc.required_actions or [])
+    
+    if regulatory is not None and regulatory.updates:
+        titles = ", ".join(f"{update.title or 'Untitled Update'} ({update.date or 'Unknown'})" for update in regulatory.updates)
+        data["summary"] = f"Regulatory updates to review for applicability: {titles}"
+    
+    return data
+
+# Mock data returned in development mode
+_MOCK_COMPLIANCE_REPORT = {
+    "summary": "This entity is generally compliant with current regulations, with minor issues requiring attention.",
+    "risk_assessment": {
+        "overall": "Medium-Low",
+        "factors": [
+            {
+                "name": "Transaction Volume",
+                "level": "Medium",
+                "details": "Higher than average transaction volume for this customer segment"
+            },
+            {
+                "name": "Geographic Risk",
+                "level": "Low",
+                "details": "Operations primarily in low-risk jurisdictions"
+            },
+            {
+                "name": "Customer Due Diligence",
+                "level": "Low",
+                "details": "All required documentation is complete and verified"
+            }
+        ]
+    },
+    "compliance_status": {
+        "overall": "Compliant with Exceptions",
+        "categories": [
+            {
+                "name": "KYC/AML",
+                "status": "Compliant",
+                "details": "All KYC requirements met"
+            },
+            {
+                "name": "Regulatory Reporting",
+                "status": "Compliant with Exceptions",
+                "details": "One late filing in the past quarter"
+            },
+            {
+                "name": "Transaction Monitoring",
+                "status": "Compliant",
+                "details": "No suspicious activity detected"
+            }
+        ]
+    },
+    "recommendations": [
+        "Review and update customer risk profile",
+        "Implement additional monitoring for high-volume transactions",
+        "Schedule quarterly compliance review"
+    ]
+}
+
+def _iter_compliance_report(report: ComplianceReport, entity_id: str, report_type: str) -> Iterator[str]:
+    """Yield a compliance report as markdown, one fragment at a time."""
+    return _TPL_REPORT.generate(report=report, entity_id=entity_id, report_type=report_type, ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+def _format_compliance_report(report: ComplianceReport, entity_id: str, report_type: str) -> str:
+    """Format a compliance report as markdown."""
+    return "".join(_iter_compliance_report(report, entity_id, report_type))
 
 @mcp.tool()
 async def generate_compliance_report(entity_id: str, report_type: str) -> str:
@@ -337,55 +958,9 @@ async def generate_compliance_report(entity_id: str, report_type: str) -> str:
     """
     # In development mode, return mock data
     if os.environ.get("DEVELOPMENT_MODE"):
-        mock_data = {
-            "summary": "This entity is generally compliant with current regulations, with minor issues requiring attention.",
-            "risk_assessment": {
-                "overall": "Medium-Low",
-                "factors": [
-                    {
-                        "name": "Transaction Volume",
-                        "level": "Medium",
-                        "details": "Higher than average transaction volume for this customer segment"
-                    },
-                    {
-                        "name": "Geographic Risk",
-                        "level": "Low",
-                        "details": "Operations primarily in low-risk jurisdictions"
-                    },
-                    {
-                        "name": "Customer Due Diligence",
-                        "level": "Low",
-                        "details": "All required documentation is complete and verified"
-                    }
-                ]
-            },
-            "compliance_status": {
-                "overall": "Compliant with Exceptions",
-                "categories": [
-                    {
-                        "name": "KYC/AML",
-                        "status": "Compliant",
-                        "details": "All KYC requirements met"
-                    },
-                    {
-                        "name": "Regulatory Reporting",
-                        "status": "Compliant with Exceptions",
-                        "details": "One late filing in the past quarter"
-                    },
-                    {
-                        "name": "Transaction Monitoring",
-                        "status": "Compliant",
-                        "details": "No suspicious activity detected"
-                    }
-                ]
-            },
-            "recommendations": [
-                "Review and update customer risk profile",
-                "Implement additional monitoring for high-volume transactions",
-                "Schedule quarterly compliance review"
-            ]
-        }
-        data = mock_data
+        data = _MOCK_COMPLIANCE_REPORT
+    elif REPORT_FANOUT:
+        data = await _gather_report_data(entity_id, report_type)
     else:
         data = await make_api_request(
             "reports/generate", 
@@ -396,48 +971,23 @@ async def generate_compliance_report(entity_id: str, report_type: str) -> str:
     if "error" in data:
         return f"Error generating compliance report: {data['error']}"
     
-    # Format the compliance report
-    result = f"## {report_type.capitalize()} Compliance Report\n\n"
-    result += f"**Entity ID**: {entity_id}\n"
-    result += f"**Report Time**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    result += f"**Report Type**: {report_type.capitalize()}\n\n"
+    try:
+        report = ComplianceReport.model_validate(data)
+    except ValidationError as e:
+        return f"Error generating compliance report: {_invalid_response(e)}"
     
-    if "summary" in data:
-        result += f"### Summary\n\n{data['summary']}\n\n"
-    
-    if "risk_assessment" in data:
-        risk = data["risk_assessment"]
-        result += f"### Risk Assessment\n\n"
-        result += f"**Overall Risk**: {risk.get('overall', 'Unknown')}\n"
-        
-        if "factors" in risk and risk["factors"]:
-            result += "\n**Risk Factors**:\n"
-            for factor in risk["factors"]:
-                result += f"- **{factor['name']}**: {factor['level']}\n"
-                if "details" in factor:
-                    result += f"  - {factor['details']}\n"
-    
-    if "compliance_status" in data:
-        status = data["compliance_status"]
-        result += f"\n### Compliance Status\n\n"
-        result += f"**Status**: {status.get('overall', 'Unknown')}\n\n"
-        
-        if "categories" in status and status["categories"]:
-            for category in status["categories"]:
-                result += f"- **{category['name']}**: {category['status']}\n"
-                if "details" in category:
-                    result += f"  - {category['details']}\n"
-    
-    if "recommendations" in data and data["recommendations"]:
-        result += "\n### Recommendations\n\n"
-        for rec in data["recommendations"]:
-            result += f"- {rec}\n"
-    
-    return result
-
-# HTML for the homepage
-async def homepage(request: Request) -> HTMLResponse:
-    html_content = """
+    size = 0
+    if report.risk_assessment is not None:
+        size += len(report.risk_assessment.factors or ())
+    if report.compliance_status is not None:
+        size += len(report.compliance_status.categories or ())
+    # Large reports are formatted in a worker thread to keep the event loop responsive
+    if size > FORMAT_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(_format_compliance_report, report, entity_id, report_type)
+    return _format_compliance_report(report, entity_id, report_type)
+
+# HTML for the homepage, encoded once since it never changes
+HOMEPAGE_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -587,7 +1137,76 @@ async def homepage(request: Request) -> HTMLResponse:
     </body>
     </html>
     """
-    return HTMLResponse(html_content)
+_HOMEPAGE_BODY = HOMEPAGE_HTML.encode("utf-8")
+
+async def homepage(request: Request) -> Response:
+    return Response(
+        content=_HOMEPAGE_BODY,
+        media_type="text/html",
+        headers={"cache-control": "public, max-age=3600"}
+    )
+
+# Hardcoded list of tools with their descriptions and parameters
+TOOLS = [
+    {
+        "name": "analyze_transaction",
+        "description": "Analyze a financial transaction for compliance issues.",
+        "parameters": [
+            {
+                "name": "transaction_id",
+                "type": "string",
+                "description": "The ID of the transaction to analyze"
+            }
+        ]
+    },
+    {
+        "name": "verify_customer_kyc",
+        "description": "Verify Know Your Customer (KYC) compliance for a specific customer.",
+        "parameters": [
+            {
+                "name": "customer_id",
+                "type": "string",
+                "description": "The ID of the customer to verify"
+            }
+        ]
+    },
+    {
+        "name": "analyze_communication",
+        "description": "Analyze customer communication for compliance issues.",
+        "parameters": [
+            {
+                "name": "communication_id",
+                "type": "string",
+                "description": "The ID of the communication to analyze"
+            }
+        ]
+    },
+    {
+        "name": "get_regulatory_updates",
+        "description": "Get the latest regulatory updates and changes relevant to financial compliance.",
+        "parameters": []
+    },
+    {
+        "name": "generate_compliance_report",
+        "description": "Generate a compliance report for a specific entity.",
+        "parameters": [
+            {
+                "name": "entity_id",
+                "type": "string",
+                "description": "The ID of the entity (customer, account, etc.)"
+            },
+            {
+                "name": "report_type",
+                "type": "string",
+                "description": "Type of report (summary, detailed, risk, audit)"
+            }
+        ]
+    }
+]
+_TOOLS_BODY = orjson.dumps({"tools": TOOLS})
+_TOOLS_ETAG = f'"{hashlib.md5(_TOOLS_BODY).hexdigest()}"'
+# Sent as a weak validator, since GZipMiddleware serves gzip and identity bodies under the same tag
+_TOOLS_HEADERS = {"cache-control": "public, max-age=86400", "etag": f"W/{_TOOLS_ETAG}"}
 
 # Create a Starlette application with SSE transport
 def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
@@ -610,65 +1229,13 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
             )
 
     # API endpoint to get available tools
-    async def get_tools(request: Request) -> JSONResponse:
-        # Hardcoded list of tools with their descriptions and parameters
-        tools = [
-            {
-                "name": "analyze_transaction",
-                "description": "Analyze a financial transaction for compliance issues.",
-                "parameters": [
-                    {
-                        "name": "transaction_id",
-                        "type": "string",
-                        "description": "The ID of the transaction to analyze"
-                    }
-                ]
-            },
-            {
-                "name": "verify_customer_kyc",
-                "description": "Verify Know Your Customer (KYC) compliance for a specific customer.",
-                "parameters": [
-                    {
-                        "name": "customer_id",
-                        "type": "string",
-                        "description": "The ID of the customer to verify"
-                    }
-                ]
-            },
-            {
-                "name": "analyze_communication",
-                "description": "Analyze customer communication for compliance issues.",
-                "parameters": [
-                    {
-                        "name": "communication_id",
-                        "type": "string",
-                        "description": "The ID of the communication to analyze"
-                    }
-                ]
-            },
-            {
-                "name": "get_regulatory_updates",
-                "description": "Get the latest regulatory updates and changes relevant to financial compliance.",
-                "parameters": []
-            },
-            {
-                "name": "generate_compliance_report",
-                "description": "Generate a compliance report for a specific entity.",
-                "parameters": [
-                    {
-                        "name": "entity_id",
-                        "type": "string",
-                        "description": "The ID of the entity (customer, account, etc.)"
-                    },
-                    {
-                        "name": "report_type",
-                        "type": "string",
-                        "description": "Type of report (summary, detailed, risk, audit)"
-                    }
-                ]
-            }
-        ]
-        return JSONResponse({"tools": tools})
+    async def get_tools(request: Request) -> Response:
+        # The payload never changes at runtime, so a matching ETag means the client is current
+        if_none_match = request.headers.get("if-none-match", "")
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or _TOOLS_ETAG in tags:
+            return Response(status_code=304, headers=_TOOLS_HEADERS)
+        return Response(content=_TOOLS_BODY, media_type="application/json", headers=_TOOLS_HEADERS)
 
     # Create and return the Starlette application
     return Starlette(
@@ -679,25 +1246,61 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
             Route("/api/tools", endpoint=get_tools),  # API endpoint to get available tools
             Mount("/messages/", app=sse.handle_post_message),  # Endpoint for messages
         ],
+        middleware=[
+            # Compress HTML/JSON responses; SSE streams are excluded by GZipMiddleware
+            Middleware(GZipMiddleware, minimum_size=512),
+        ],
+        lifespan=_lifespan,
     )
 
+def create_app() -> Starlette:
+    """Build the application; usable as a uvicorn factory (uvicorn --factory lib.mcp.server:create_app)."""
+    return create_starlette_app(mcp._mcp_server, debug=bool(os.environ.get("DEVELOPMENT_MODE")))
+
 if __name__ == "__main__":
     # Get the underlying MCP server from FastMCP wrapper
     mcp_server = mcp._mcp_server
 
     import argparse
+    import uvicorn
     
     # Parse command-line arguments
     parser = argparse.ArgumentParser(description='Run Fintech Compliance MCP Server')
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
     parser.add_argument('--dev', action='store_true', help='Run in development mode')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        help='Number of worker processes (defaults to WEB_CONCURRENCY or 1; only 1 is supported)'
+    )
     args = parser.parse_args()
     
+    # SSE sessions live in the memory of the process that opened them, and uvicorn workers share
+    # one socket, so a POST /messages/ landing on another worker would be rejected with a 404
+    if args.workers != 1:
+        parser.error(
+            "only one worker is supported: MCP SSE sessions are held per process. "
+            "To scale out, run one instance per port behind a proxy with session affinity."
+        )
+    
     if args.dev:
         os.environ["DEVELOPMENT_MODE"] = "1"
         print("Running in development mode with mock data")
 
+    # Prefer uvloop and httptools when available (uvloop is not supported on Windows)
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+
     # Create and run the Starlette application
     starlette_app = create_starlette_app(mcp_server, debug=args.dev)
-    uvicorn.run(starlette_app, host=args.host, port=args.port)
+    uvicorn.run(starlette_app, host=args.host, port=args.port, loop=loop, http=http)